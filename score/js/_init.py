@@ -25,13 +25,29 @@
 # the discretion of STRG.AT GmbH also the competent court, in whose district
 # the Licensee has his registered seat, an establishment or assets.
 
-from functools import reduce
-from score.init import ConfiguredModule, parse_object, parse_list, parse_bool
+from functools import reduce, partial, lru_cache
+from score.init import (
+    ConfiguredModule, ConfigurationError, parse_object, parse_list, parse_bool,
+    init_cache_folder, extract_conf)
+import base64
+from fnmatch import fnmatch
+from html import escape as html_escape
+import hashlib
 import json
+import os
+import re
+import threading
+from urllib.parse import unquote, urlparse
 
 
 defaults = {
     'minifier': None,
+    'sourcemap': False,
+    'cachedir': None,
+    'inline.threshold': 0,
+    'minified.patterns': ['*.min.js'],
+    'minified.line_length': 300,
+    'warmup': 'lazy',
     'tpl.extensions': ['js'],
     'tpl.register_minifier': True,
     'tpl.html_escape': 'escape_json',
@@ -53,6 +69,57 @@ def init(confdict, tpl):
         will register a :ref:`postprocessor <tpl_file_types>` for the
         'application/javascript' file type in :mod:`score.tpl`.
 
+    :confkey:`define.*`
+        Global names, that should be replaced with constant javascript
+        expressions in minified code. The configuration ``define.DEBUG =
+        false`` will replace all references to ``DEBUG`` with ``false``, for
+        example, and remove the code that became unreachable afterwards. These
+        values are passed to the minifier, if it :attr:`supports defines
+        <score.js.minifier.MinifierBackend.supports_defines>`. In all other
+        cases, they are applied by :func:`score.js.defines.apply_defines`
+        before any further postprocessing.
+
+    :confkey:`sourcemap` :confdefault:`False`
+        Whether scripts should reference a source map, that maps them back to
+        the paths they were created from. The source map is served as a
+        separate asset, so it is only downloaded by developer tools. The files
+        of a bundle will be minified separately in this case and the resulting
+        maps will be merged. Requires a minifier that :attr:`supports source
+        maps <score.js.minifier.MinifierBackend.supports_sourcemaps>`, if
+        :confkey:`tpl.register_minifier` is enabled.
+
+    :confkey:`cachedir` :confdefault:`None`
+        An optional folder for persisting the processed content of individual
+        files, which is used when creating bundles with source maps and
+        :ref:`bundle reports <js_bundle_reports>`. The folder will be purged
+        automatically whenever this configuration changes.
+
+    :confkey:`inline.threshold` :confdefault:`0`
+        Scripts up to this size (in bytes) will be embedded into the HTML
+        document instead of being loaded with a separate request, if the
+        :ref:`paths are passed to the webassets proxy <js_inlining>`. The
+        default value of ``0`` disables this feature.
+
+    :confkey:`minified.patterns` :confdefault:`['*.min.js']`
+        A list of glob patterns matching the paths of files, that are already
+        minified. These files will be included in bundles verbatim instead of
+        being minified again.
+
+    :confkey:`minified.line_length` :confdefault:`300`
+        Files with an average line length above this value are also considered
+        to be minified already. Files containing an ``@minified`` marker in a
+        comment at the beginning of the file are always treated this way.
+        Setting this to ``0`` disables the heuristic.
+
+    :confkey:`warmup` :confdefault:`lazy`
+        When to perform the expensive preparations of this module (see
+        :meth:`ConfiguredJsModule.warmup`). The default value ``lazy`` will
+        defer all of them until they are needed. The value ``eager`` will
+        perform them during initialization, so that errors are detected
+        early, whereas ``background`` will perform them in a separate thread
+        after initialization, keeping the startup fast without burdening the
+        first request.
+
     :confkey:`tpl.html_escape` :confdefault:`escape_json`
         An optional function, that will be registered as a
         :ref:`global function <tpl_globals>` in 'text/html' templates.
@@ -65,8 +132,29 @@ def init(confdict, tpl):
     minifier = None
     if conf['minifier']:
         minifier = parse_object(conf, 'minifier')
-        if tpl_register_minifier:
-            filetype.postprocessors.append(minifier.minify_string)
+    defines = extract_conf(conf, 'define.')
+    if defines:
+        if minifier and tpl_register_minifier and minifier.supports_defines:
+            minifier.defines = dict(defines)
+        else:
+            from .defines import apply_defines
+            filetype.postprocessors.append(
+                partial(apply_defines, defines=dict(defines)))
+    if minifier and tpl_register_minifier:
+        filetype.postprocessors.append(minifier.minify_string)
+    sourcemap = parse_bool(conf['sourcemap'])
+    if sourcemap and minifier and tpl_register_minifier and \
+            not minifier.supports_sourcemaps:
+        import score.js
+        raise ConfigurationError(
+            score.js, 'Configured minifier does not support source maps')
+    if conf['warmup'] not in ('lazy', 'eager', 'background'):
+        import score.js
+        raise ConfigurationError(
+            score.js, 'Invalid warmup value "%s"' % (conf['warmup'],))
+    cachedir = None
+    if conf['cachedir']:
+        cachedir = init_cache_folder(conf, 'cachedir', autopurge=True)
     extensions = parse_list(conf['tpl.extensions'])
     filetype.extensions.extend(extensions)
     if conf['tpl.html_escape']:
@@ -74,7 +162,14 @@ def init(confdict, tpl):
             conf['tpl.html_escape'],
             lambda value: escape(json.dumps(value)),
             escape=False)
-    return ConfiguredJsModule(tpl, minifier, tpl_register_minifier, extensions)
+    return ConfiguredJsModule(tpl, minifier, tpl_register_minifier, extensions,
+                              sourcemap=sourcemap, cachedir=cachedir,
+                              inline_threshold=int(conf['inline.threshold']),
+                              minified_patterns=parse_list(
+                                  conf['minified.patterns']),
+                              minified_line_length=int(
+                                  conf['minified.line_length']),
+                              warmup=conf['warmup'])
 
 
 _js_escapes = tuple([('%c' % z, '\\u%04X' % z) for z in range(32)] + [
@@ -99,57 +194,589 @@ def escape(value):
     return reduce(lambda a, kv: a.replace(*kv), _js_escapes, value)
 
 
+_script_escape_regex = re.compile(r'<(/script|!--)', re.IGNORECASE)
+
+
+def escape_script(value):
+    """
+    Escapes a javascript *value* to ensure it is safe to embed it in an HTML
+    ``<script>`` tag. Unlike :func:`escape`, this function will only modify
+    the character sequences, that would end the script block prematurely.
+    """
+    return _script_escape_regex.sub(r'<\\\1', value)
+
+
 class ConfiguredJsModule(ConfiguredModule):
     """
     This module's :class:`configuration object
     <score.init.ConfiguredModule>`.
     """
 
-    def __init__(self, tpl, minifier, tpl_register_minifier, extensions):
+    def __init__(self, tpl, minifier, tpl_register_minifier, extensions, *,
+                 sourcemap=False, cachedir=None, inline_threshold=0,
+                 minified_patterns=(), minified_line_length=0,
+                 warmup='lazy'):
         super().__init__(__package__)
         self.tpl = tpl
         self.minifier = minifier
         self.tpl_register_minifier = tpl_register_minifier
         self.extensions = extensions
+        self.sourcemap = sourcemap
+        self.cachedir = cachedir
+        self.inline_threshold = inline_threshold
+        self.minified_patterns = list(minified_patterns)
+        self.minified_line_length = minified_line_length
+        self._warmup_mode = warmup
+        self._warmup_thread = None
+        self._module_minifier = None
+        if minifier:
+            self._module_minifier = minifier.module_variant()
+        self._segments = {}
+        self._sourcemap_bundles = {}
+        self._inline_cache = {}
+        self._webassets_proxy = None
+
+    def _finalize(self, tpl):
+        if self._warmup_mode == 'eager':
+            self.warmup()
+        elif self._warmup_mode == 'background':
+            self._warmup_thread = threading.Thread(
+                target=self._background_warmup,
+                name='score.js warmup',
+                daemon=True)
+            self._warmup_thread.start()
+
+    def _background_warmup(self):
+        try:
+            self.warmup()
+        except Exception:
+            self.log.exception('Warmup failed')
+
+    def warmup(self):
+        """
+        Performs all expensive preparations, that would otherwise happen
+        during the first requests: The minifier is :meth:`warmed up
+        <score.js.minifier.MinifierBackend.warmup>` and the processed files
+        persisted in the :confkey:`cachedir` are loaded into memory.
+        """
+        if self.minifier:
+            self.minifier.warmup()
+            if self._module_minifier is not self.minifier:
+                self._module_minifier.warmup()
+        if not self.cachedir:
+            return
+        for path in self.tpl.iter_paths(mimetype='application/javascript'):
+            hash_ = self.tpl.hash(path)
+            segment = self._load_segment(self._segment_cachefile(path, hash_))
+            if segment is not None:
+                self._segments[path] = (hash_, segment)
+
+    def inline_csp_hashes(self):
+        """
+        Provides the `list` of hashes of all scripts, that were inlined so
+        far, in the format expected by the ``script-src`` directive of a
+        Content Security Policy (like ``'sha256-...'``). Scripts, that
+        changed since they were inlined, are omitted.
+        """
+        proxy = self.score_webassets_proxy()
+        hashes = set()
+        for paths, entry in list(self._inline_cache.items()):
+            hash_, content, csp_hash, inlined = entry
+            if inlined and hash_ == proxy._inline_hash(paths):
+                hashes.add(csp_hash)
+        return sorted(hashes)
+
+    def inline_csp_hash(self, paths):
+        """
+        Provides the hash of the inline script consisting of given *paths* in
+        the format of :meth:`inline_csp_hashes`. This allows building the
+        Content Security Policy before the script is rendered. The *paths*
+        must be the ones the script will be rendered with, i.e. a single path
+        for scripts that are not bundled.
+        """
+        return self.score_webassets_proxy()._inline_entry(tuple(paths))[1]
+
+    def link_header(self, urls, *, rel='preload', fetchpriority=None):
+        """
+        Provides the value of an HTTP ``Link`` header, that tells the browser
+        to fetch the scripts at given *urls* early. The *rel* may either be
+        ``preload`` for classic scripts or ``modulepreload`` for javascript
+        modules. See :ref:`js_resource_hints` for details.
+        """
+        return _format_hints(tuple(urls), rel, fetchpriority, True)
+
+    def _is_minified(self, path, content):
+        """
+        Tests whether the file with given *path* and *content* was already
+        minified and should thus be left untouched.
+        """
+        if any(fnmatch(path, pattern) for pattern in self.minified_patterns):
+            return True
+        if _minified_marker_regex.search(content, 0, 1024):
+            return True
+        if self.minified_line_length and len(content) >= 1024:
+            lines = content.count('\n') + 1
+            return len(content) / lines > self.minified_line_length
+        return False
+
+    def _postprocess(self, content, module=False):
+        """
+        Applies all postprocessors to given *content*. If *module* is `True`,
+        the content is a complete :ref:`module bundle <js_module_bundles>` and
+        the minifier's module variant is used.
+        """
+        filetype = self.tpl.filetypes['application/javascript']
+        for postprocessor in filetype.postprocessors:
+            if module and self.minifier and \
+                    postprocessor == self.minifier.minify_string:
+                postprocessor = self._module_minifier.minify_string
+            content = postprocessor(content)
+        return content
+
+    @property
+    def _minify_segments(self):
+        return bool(self.minifier and self.tpl_register_minifier)
+
+    def _render_segment(self, path):
+        """
+        Provides the processed content of a single *path* as a 2-tuple
+        containing the content and its :class:`score.js.sourcemap.SourceMap`,
+        which is only created if :confkey:`sourcemap` is enabled. Results are
+        cached in memory and--if a :confkey:`cachedir` was configured--on disk.
+
+        The *path* may also denote the :ref:`module variant
+        <js_module_bundles>` of a file, which shares the segment of the
+        classic script: The module minifier may only be applied to complete
+        bundles.
+        """
+        path = _split_module_path(path)[1]
+        hash_ = self.tpl.hash(path)
+        if path in self._segments:
+            cached_hash, segment = self._segments[path]
+            if cached_hash == hash_:
+                return segment
+        cachefile = self._segment_cachefile(path, hash_)
+        segment = self._load_segment(cachefile)
+        if segment is None:
+            segment = self._create_segment(path)
+            if cachefile:
+                with open(cachefile, 'w', encoding='UTF-8') as fp:
+                    sourcemap = segment[1]
+                    if sourcemap is not None:
+                        sourcemap = sourcemap.to_json()
+                    json.dump({
+                        'content': segment[0],
+                        'sourcemap': sourcemap,
+                    }, fp)
+        self._segments[path] = (hash_, segment)
+        return segment
+
+    def _segment_cachefile(self, path, hash_):
+        if not self.cachedir:
+            return None
+        key = hashlib.sha1(('%s\0%s' % (path, hash_)).encode('UTF-8'))
+        return os.path.join(self.cachedir, key.hexdigest() + '.json')
+
+    def _load_segment(self, cachefile):
+        from .sourcemap import SourceMap
+        if not cachefile:
+            return None
+        try:
+            with open(cachefile, encoding='UTF-8') as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        sourcemap = data['sourcemap']
+        if sourcemap is not None:
+            sourcemap = SourceMap.from_json(sourcemap)
+        return data['content'], sourcemap
+
+    def _sourcemap_key(self, paths):
+        """
+        Provides a short key identifying the source map of the script
+        consisting of given *paths*. The key is registered, so that the map
+        can be served later on, and persisted in the :confkey:`cachedir` for
+        other processes.
+        """
+        paths = tuple(paths)
+        if any(path.startswith(_sourcemap_prefix) for path in paths):
+            raise ValueError('Source maps do not have source maps')
+        key = hashlib.sha1('\n'.join(paths).encode('UTF-8')).hexdigest()[:16]
+        if key in self._sourcemap_bundles:
+            return key
+        self._sourcemap_bundles[key] = paths
+        if self.cachedir:
+            file = os.path.join(self.cachedir, 'sourcemap-%s.json' % key)
+            if not os.path.exists(file):
+                with open(file, 'w', encoding='UTF-8') as fp:
+                    json.dump(paths, fp)
+        return key
+
+    def _sourcemap_paths(self, path):
+        """
+        Provides the script paths of a virtual source map *path* as created by
+        :func:`_sourcemap_comment`. Returns an empty `tuple` for unknown paths
+        and for paths referring to other source maps.
+        """
+        match = _sourcemap_path_regex.match(path)
+        if not match:
+            return ()
+        key = match.group(1)
+        if key in self._sourcemap_bundles:
+            return self._sourcemap_bundles[key]
+        if not self.cachedir:
+            return ()
+        file = os.path.join(self.cachedir, 'sourcemap-%s.json' % key)
+        try:
+            with open(file, encoding='UTF-8') as fp:
+                paths = tuple(json.load(fp))
+        except (OSError, ValueError):
+            return ()
+        if any(path.startswith(_sourcemap_prefix) for path in paths):
+            return ()
+        self._sourcemap_bundles[key] = paths
+        return paths
+
+    def _create_segment(self, path):
+        from .sourcemap import SourceMap
+        content = self.tpl.render(path, apply_postprocessors=False)
+        if self._is_minified(path, content):
+            if self.sourcemap:
+                return content, SourceMap.identity(path, content)
+            return content, None
+        filetype = self.tpl.filetypes['application/javascript']
+        for postprocessor in filetype.postprocessors:
+            if self._minify_segments and \
+                    postprocessor == self.minifier.minify_string:
+                continue
+            content = postprocessor(content)
+        if not self.sourcemap:
+            if self._minify_segments:
+                content = self.minifier.minify_string(content, path=path)
+            return content, None
+        if self._minify_segments:
+            return self.minifier.minify_string_with_sourcemap(
+                content, path=path)
+        return content, SourceMap.identity(path, content)
+
+    def _create_bundle(self, paths):
+        """
+        Concatenates the :meth:`segments <_render_segment>` of all *paths* and
+        returns the result and the merged source map.
+        """
+        from .sourcemap import concatenate
+        parts = []
+        for path in paths:
+            if not self._minify_segments and len(paths) > 1:
+                parts.append((_bundle_banner(path), None))
+            parts.append(self._render_segment(path))
+        if self._minify_segments:
+            # the semicolon prevents minified statements from merging
+            return concatenate(parts, '\n;\n')
+        return concatenate(parts, '\n\n')
 
     def score_webassets_proxy(self):
         """
         Provides a :class:`WebassetsProxy` for :mod:`score.webassets`.
         """
-        from score.webassets import TemplateWebassetsProxy
+        if self._webassets_proxy is not None:
+            return self._webassets_proxy
+        from score.webassets import AssetNotFound, TemplateWebassetsProxy
+        from score.tpl import TemplateNotFound
 
         class JavascriptWebassetsProxy(TemplateWebassetsProxy):
 
-            def __init__(self, tpl):
-                super().__init__(tpl, 'application/javascript')
+            def __init__(self, conf):
+                super().__init__(conf.tpl, 'application/javascript')
+                self.conf = conf
+
+            def validate_path(self, path):
+                if path.startswith(_sourcemap_prefix):
+                    paths = self.conf._sourcemap_paths(path)
+                    return bool(paths) and all(map(self.validate_path, paths))
+                return super().validate_path(_split_module_path(path)[1])
+
+            def hash(self, path):
+                if path.startswith(_sourcemap_prefix):
+                    return self.bundle_hash(self.conf._sourcemap_paths(path))
+                if self.conf.sourcemap:
+                    # the map must be available, even if the script itself
+                    # was rendered by another process
+                    self.conf._sourcemap_key((path,))
+                return super().hash(_split_module_path(path)[1])
+
+            def mimetype(self, path):
+                if path.startswith(_sourcemap_prefix):
+                    return 'application/json'
+                return super().mimetype(path)
+
+            def bundle_hash(self, paths):
+                if self.conf.sourcemap and paths and not any(
+                        path.startswith(_sourcemap_prefix) for path in paths):
+                    self.conf._sourcemap_key(paths)
+                return super().bundle_hash(
+                    [_split_module_path(path)[1] for path in paths])
+
+            def render(self, path):
+                if path.startswith(_sourcemap_prefix):
+                    paths = self.conf._sourcemap_paths(path)
+                    if not paths:
+                        raise AssetNotFound('???', path)
+                    try:
+                        sourcemap = self.conf._create_bundle(paths)[1]
+                    except TemplateNotFound:
+                        raise AssetNotFound('???', path)
+                    return json.dumps(sourcemap.to_json())
+                try:
+                    content = self._render_content((path,))
+                except TemplateNotFound:
+                    return super().render(_split_module_path(path)[1])
+                if self.conf.sourcemap:
+                    # the url of this asset is relative to the module's root
+                    content += '\n' + _sourcemap_comment(
+                        self.conf._sourcemap_key((path,)),
+                        '../' * path.count('/'))
+                return content
 
             def render_url(self, url, **kwargs):
+                fetchpriority = kwargs.get('fetchpriority')
+                hint = kwargs.get('hint')
+                if hint:
+                    return _format_hints((url,), hint, fetchpriority, False)
+                type_attrs = ''
+                if kwargs.get('type') == 'module':
+                    if kwargs.get('nomodule', False):
+                        raise ValueError(
+                            'Cannot set type=module and nomodule at once')
+                    type_attrs = ' type="module"'
+                elif kwargs.get('type'):
+                    raise ValueError('Invalid script type "%s"' %
+                                     (kwargs['type'],))
+                elif kwargs.get('nomodule', False):
+                    type_attrs = ' nomodule="nomodule"'
                 async_ = (kwargs.get('async', False)
                           or kwargs.get('async_', False))
                 defer = kwargs.get('defer', False)
                 if async_ and defer:
                     raise ValueError('Cannot set async and defer at once')
-                attrs = ''
+                if fetchpriority:
+                    _validate_fetchpriority(fetchpriority)
+                inline = kwargs.get('inline', None)
+                if inline:
+                    if async_ or defer:
+                        raise ValueError(
+                            'Cannot inline async or deferred scripts')
+                    if fetchpriority:
+                        raise ValueError(
+                            'Cannot set fetchpriority of inline scripts')
+                    if not kwargs.get('paths'):
+                        raise ValueError(
+                            'Cannot inline scripts without their paths')
+                if inline is not False and not async_ and not defer:
+                    content = self._render_inline(
+                        url, kwargs.get('paths'), force=bool(inline))
+                    if content is not None:
+                        nonce = kwargs.get('nonce')
+                        attrs = type_attrs
+                        if nonce:
+                            attrs += ' nonce="%s"' % html_escape(nonce)
+                        return '<script%s>%s</script>' % (attrs, content)
+                attrs = type_attrs
                 if async_:
-                    attrs = ' async="async"'
+                    attrs += ' async="async"'
                 elif defer:
-                    attrs = ' defer="defer"'
+                    attrs += ' defer="defer"'
+                if fetchpriority:
+                    attrs += ' fetchpriority="%s"' % fetchpriority
                 return '<script src="%s"%s></script>' % (url, attrs)
 
+            def _render_inline(self, url, paths, force=False):
+                """
+                Provides the escaped content of the script at *url* for
+                embedding it into an HTML document, or `None` if it should
+                not be inlined.
+                """
+                if not paths or not (force or self.conf.inline_threshold):
+                    return None
+                if '/__bundle_' not in urlparse(url).path:
+                    # not a bundle: find the single path this url points to
+                    paths = _url_asset_path(url, paths)
+                    if not paths:
+                        if force:
+                            raise ValueError(
+                                'None of the paths belongs to url "%s"' %
+                                (url,))
+                        return None
+                paths = tuple(paths)
+                content = self._inline_entry(paths)[0]
+                if not force and \
+                        len(content.encode('UTF-8')) > \
+                        self.conf.inline_threshold:
+                    return None
+                entry = self.conf._inline_cache[paths]
+                if not entry[3]:
+                    self.conf._inline_cache[paths] = entry[:3] + (True,)
+                return content
+
+            def _inline_entry(self, paths):
+                """
+                Provides a 2-tuple containing the escaped content of the
+                script consisting of given *paths* and its CSP hash. The
+                content does not reference a source map, since there is no
+                url the reference could be relative to.
+                """
+                hash_ = self._inline_hash(paths)
+                cached = self.conf._inline_cache.get(paths)
+                if cached and cached[0] == hash_:
+                    return cached[1:3]
+                content = escape_script(self._render_content(paths))
+                csp_hash = "'sha256-%s'" % base64.b64encode(
+                    hashlib.sha256(content.encode('UTF-8')).digest()
+                ).decode('ASCII')
+                # the last value tells whether the script was actually inlined
+                self.conf._inline_cache[paths] = \
+                    (hash_, content, csp_hash, False)
+                return content, csp_hash
+
+            def _inline_hash(self, paths):
+                if len(paths) == 1:
+                    return self.hash(paths[0])
+                return self.bundle_hash(paths)
+
             def create_bundle(self, paths):
                 """
                 Renders the combined js file.
                 """
-                parts = []
-                for path in paths:
-                    s = '/*{0}*/\n/*{1:^74}*/\n/*{0}*/'.format('*' * 74, path)
-                    parts.append(s)
-                    parts.append(self.tpl.render(path,
-                                                 apply_postprocessors=False))
-                content = '\n\n'.join(parts)
-                filetype = self.tpl.filetypes['application/javascript']
-                for postprocessor in filetype.postprocessors:
-                    content = postprocessor(content)
+                content = self._render_content(paths)
+                if self.conf.sourcemap:
+                    content += '\n' + _sourcemap_comment(
+                        self.conf._sourcemap_key(paths))
                 return content
 
-        return JavascriptWebassetsProxy(self.tpl)
+            def _render_content(self, paths):
+                """
+                Renders the scripts with given *paths* without a reference to
+                their source map.
+                """
+                variants = set(_split_module_path(path)[0] for path in paths)
+                if len(variants) > 1:
+                    raise ValueError(
+                        'Cannot bundle modules and classic scripts together')
+                if self.conf.sourcemap or not self.conf._minify_segments:
+                    # unminified bundles are always built from the segments,
+                    # so they look the same with and without source maps
+                    return self.conf._create_bundle(paths)[0]
+                contents = []
+                for path in paths:
+                    path = _split_module_path(path)[1]
+                    content = self.tpl.render(path, apply_postprocessors=False)
+                    contents.append(
+                        (content, self.conf._is_minified(path, content)))
+                # the module minifier mangles top-level names, it can thus
+                # only process the bundle as a whole
+                module = True in variants and \
+                    not any(minified for _, minified in contents)
+                chunks = []
+                parts = []
+                for content, minified in contents:
+                    if not minified:
+                        parts.append(content)
+                        continue
+                    # already minified files are passed through, only the
+                    # files between them are postprocessed
+                    if parts:
+                        chunks.append(
+                            self.conf._postprocess('\n\n'.join(parts)))
+                        parts = []
+                    chunks.append(content)
+                if parts:
+                    chunks.append(self.conf._postprocess(
+                        '\n\n'.join(parts), module=module))
+                # the semicolon prevents statements of adjacent chunks from
+                # merging
+                return '\n;\n'.join(chunks)
+
+        self._webassets_proxy = JavascriptWebassetsProxy(self)
+        return self._webassets_proxy
+
+
+_module_prefix = '@module/'
+
+_sourcemap_prefix = '@sourcemap/'
+
+_sourcemap_path_regex = re.compile(r'^@sourcemap/([0-9a-f]{16})\.map$')
+
+_minified_marker_regex = re.compile(r'(//|/\*)[\s!*]*@minified\b')
+
+
+def _split_module_path(path):
+    """
+    Splits given *path* into a 2-tuple consisting of a `bool` indicating
+    whether the :ref:`module variant <js_module_bundles>` of the file was
+    requested and the path of the underlying template.
+    """
+    if path.startswith(_module_prefix):
+        return True, path[len(_module_prefix):]
+    return False, path
+
+
+def _url_asset_path(url, paths):
+    """
+    Determines which of given *paths* the asset *url* points to and returns
+    it as a 1-tuple, or an empty `tuple` if there is no such path. Urls
+    created by :mod:`score.webassets` look like
+    ``/_assets/<module>/<path>?_v=<hash>``. If the url does not have that
+    form, the longest path the url ends with is chosen.
+    """
+    url_path = unquote(urlparse(url).path)
+    if '/_assets/' in url_path:
+        asset_path = url_path.split('/_assets/', 1)[1].partition('/')[2]
+        return tuple(path for path in paths if path == asset_path)[:1]
+    matches = [path for path in paths if url_path.endswith('/' + path)]
+    if not matches:
+        return ()
+    return (max(matches, key=len),)
+
+
+def _sourcemap_comment(key, base=''):
+    """
+    Creates the comment referencing the source map with given *key* (see
+    :meth:`ConfiguredJsModule._sourcemap_key`). The source map is provided by
+    the webassets proxy under a virtual path relative to the module's root
+    url. The *base* must thus lead from the script's url to that root.
+    """
+    return '//# sourceMappingURL=%s%s%s.map' % (base, _sourcemap_prefix, key)
+
+
+def _validate_fetchpriority(fetchpriority):
+    if fetchpriority not in ('high', 'low', 'auto'):
+        raise ValueError('Invalid fetchpriority "%s"' % (fetchpriority,))
+
+
+@lru_cache(maxsize=256)
+def _format_hints(urls, rel, fetchpriority, header):
+    """
+    Creates the resource hints of given *rel* for all *urls*, either as
+    ``<link>`` tags or--if *header* is `True`--as the value of an HTTP
+    ``Link`` header. Results are cached, as the same sets of urls are
+    requested over and over again.
+    """
+    if rel not in ('preload', 'modulepreload'):
+        raise ValueError('Invalid resource hint "%s"' % (rel,))
+    params = []
+    if rel == 'preload':
+        params.append(('as', 'script'))
+    if fetchpriority:
+        _validate_fetchpriority(fetchpriority)
+        params.append(('fetchpriority', fetchpriority))
+    if header:
+        params = ''.join('; %s=%s' % param for param in params)
+        return ', '.join('<%s>; rel=%s%s' % (url, rel, params)
+                         for url in urls)
+    params = ''.join(' %s="%s"' % param for param in params)
+    return ''.join('<link rel="%s" href="%s"%s>' % (rel, url, params)
+                   for url in urls)
+
+
+def _bundle_banner(path):
+    return '/*{0}*/\n/*{1:^74}*/\n/*{0}*/'.format('*' * 74, path)
@@ -0,0 +1,93 @@
+# Copyright © 2015-2018 STRG.AT GmbH, Vienna, Austria
+# Copyright © 2019 Necdet Can Ateşman <can@atesman.at>, Vienna, Austria
+#
+# This file is part of the The SCORE Framework.
+#
+# The SCORE Framework and all its parts are free software: you can redistribute
+# them and/or modify them under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation which is in
+# the file named COPYING.LESSER.txt.
+#
+# The SCORE Framework and all its parts are distributed without any WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. For more details see the GNU Lesser General Public
+# License.
+#
+# If you have not received a copy of the GNU Lesser General Public License see
+# http://www.gnu.org/licenses/.
+#
+# The License-Agreement realised between you as Licensee and STRG.AT GmbH as
+# Licenser including the issue of its valid conclusion and its pre- and
+# post-contractual effects is governed by the laws of Austria. Any disputes
+# concerning this License-Agreement including the issue of its valid conclusion
+# and its pre- and post-contractual effects are exclusively decided by the
+# competent court, in whose district STRG.AT GmbH has its registered seat, at
+# the discretion of STRG.AT GmbH also the competent court, in whose district
+# the Licensee has his registered seat, an establishment or assets.
+
+
+import click
+import json
+import sys
+
+from .report import measures, create_report, render_html, check_budget
+
+
+@click.group()
+def main():
+    """
+    Manages javascript bundles.
+    """
+    pass
+
+
+@main.command('report')
+@click.option('-f', '--format', 'format_', default='json',
+              type=click.Choice(['json', 'html']))
+@click.option('-p', '--previous', type=click.Path(dir_okay=False),
+              help='The JSON report of the previous build.')
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True),
+              help='File to write the report to.')
+@click.option('--budget', type=int,
+              help='Maximum size of the whole bundle in bytes.')
+@click.option('--path-budget', type=int,
+              help='Maximum size of every path in bytes.')
+@click.option('--budget-measure', default='gzipped',
+              type=click.Choice(measures))
+@click.argument('paths', nargs=-1)
+@click.pass_context
+def report(clickctx, format_, previous, output, budget, path_budget,
+           budget_measure, paths):
+    """
+    Provides the composition of a bundle.
+    """
+    js = clickctx.obj['conf'].load('js')
+    if not paths:
+        proxy = js.score_webassets_proxy()
+        paths = list(proxy.iter_default_bundle_paths())
+    previous_report = None
+    if previous:
+        try:
+            with open(previous, encoding='UTF-8') as fp:
+                previous_report = json.load(fp)
+        except FileNotFoundError:
+            pass
+    result = create_report(js, paths, previous_report)
+    if format_ == 'html':
+        rendered = render_html(result)
+    else:
+        rendered = json.dumps(result, indent=2)
+    if output:
+        with open(output, 'w', encoding='UTF-8') as fp:
+            fp.write(rendered)
+    else:
+        click.echo(rendered)
+    violations = check_budget(result, budget, path_budget, budget_measure)
+    for violation in violations:
+        click.echo(violation, err=True)
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
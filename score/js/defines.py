@@ -0,0 +1,606 @@
+# Copyright © 2015-2018 STRG.AT GmbH, Vienna, Austria
+# Copyright © 2019 Necdet Can Ateşman <can@atesman.at>, Vienna, Austria
+#
+# This file is part of the The SCORE Framework.
+#
+# The SCORE Framework and all its parts are free software: you can redistribute
+# them and/or modify them under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation which is in
+# the file named COPYING.LESSER.txt.
+#
+# The SCORE Framework and all its parts are distributed without any WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. For more details see the GNU Lesser General Public
+# License.
+#
+# If you have not received a copy of the GNU Lesser General Public License see
+# http://www.gnu.org/licenses/.
+#
+# The License-Agreement realised between you as Licensee and STRG.AT GmbH as
+# Licenser including the issue of its valid conclusion and its pre- and
+# post-contractual effects is governed by the laws of Austria. Any disputes
+# concerning this License-Agreement including the issue of its valid conclusion
+# and its pre- and post-contractual effects are exclusively decided by the
+# competent court, in whose district STRG.AT GmbH has its registered seat, at
+# the discretion of STRG.AT GmbH also the competent court, in whose district
+# the Licensee has his registered seat, an establishment or assets.
+
+
+"""
+A pure-python pre-pass for replacing global definitions with constant values
+and removing the branches, that became unreachable through this replacement.
+This is used for minifier backends, that do not support global definitions
+themselves.
+
+The implementation is deliberately conservative: Just like uglify's
+``--define``, it only replaces undeclared globals, i.e. a name that is
+declared anywhere in a file (as a variable, function, class, parameter, ...)
+is not replaced in that file at all. Assignment targets, property names and
+the like are never replaced either. Afterwards, it only folds ``if``
+statements with braced blocks and conditions consisting of a single literal
+(optionally negated and parenthesized). Variables declared with ``var`` in a
+removed branch are kept as bare declarations, and branches containing function
+declarations are not removed at all. All other code is left untouched for the
+minifier.
+"""
+
+import re
+
+
+_token_regex = re.compile(r'''
+    (?P<whitespace>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`)
+  | (?P<number>(?:0[xXoObB][0-9a-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)
+                 (?:[eE][+-]?\d+)?)n?)
+  | (?P<name>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)
+  | (?P<punctuation>>>>=?|\.\.\.|[=!]==|\*\*=|<<=|>>=|&&=|\|\|=|\?\?=
+                     |\?\.|=>|\+\+|--|\*\*|<<|>>|&&|\|\||\?\?
+                     |[=!<>&|+\-*/%^]=|[^\s\w$])
+''', re.VERBOSE | re.DOTALL)
+
+_regex_regex = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/\w*')
+
+# keywords after which a slash starts a regular expression
+_regex_keywords = frozenset((
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'))
+
+# keywords starting a declaration list
+_declaration_keywords = frozenset(('var', 'let', 'const'))
+
+# keywords, that may precede a parenthesized expression and a block
+_control_keywords = frozenset(('if', 'while', 'for', 'switch', 'with'))
+
+_assignment_operators = frozenset((
+    '=', '+=', '-=', '*=', '/=', '%=', '**=', '<<=', '>>=', '>>>=', '&=',
+    '|=', '^=', '&&=', '||=', '??='))
+
+_literal_regex = re.compile(r'''
+    ^(?:true|false|null|undefined|-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?
+        |"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')$
+''', re.VERBOSE)
+
+
+def tokenize(js):
+    """
+    Splits given *js* string into a `list` of 2-tuples consisting of a token
+    type and the token's text. Concatenating all texts results in the original
+    string.
+    """
+    tokens = []
+    significant = None
+    pos = 0
+    while pos < len(js):
+        if js[pos] == '/' and _regex_allowed(significant):
+            match = _regex_regex.match(js, pos)
+            if match:
+                tokens.append(('regex', match.group(0)))
+                significant = tokens[-1]
+                pos = match.end()
+                continue
+        match = _token_regex.match(js, pos)
+        if not match:
+            # unterminated string or comment: keep the rest as-is
+            tokens.append(('unknown', js[pos:]))
+            break
+        tokens.append((match.lastgroup, match.group(0)))
+        if match.lastgroup not in ('whitespace', 'comment'):
+            significant = tokens[-1]
+        pos = match.end()
+    return tokens
+
+
+def _regex_allowed(previous):
+    if previous is None:
+        return True
+    type_, text = previous
+    if type_ == 'punctuation':
+        return text not in (')', ']', '++', '--')
+    if type_ == 'name':
+        return text in _regex_keywords
+    return False
+
+
+def _is_literal(value):
+    return bool(_literal_regex.match(value.strip()))
+
+
+def apply_defines(js, defines):
+    """
+    Replaces all references to the global names in *defines*--a `dict`
+    mapping names to javascript expressions--and removes dead branches of
+    ``if`` statements afterwards. Names may contain dots (like
+    ``process.env.NODE_ENV``).
+    """
+    if not defines:
+        return js
+    tokens = _replace(tokenize(js), defines)
+    return ''.join(text for type_, text in _fold(tokens))
+
+
+def _significant(tokens, index, step):
+    """
+    Returns the index of the next token in given direction *step*, that is
+    neither whitespace nor a comment.
+    """
+    index += step
+    while 0 <= index < len(tokens):
+        if tokens[index][0] not in ('whitespace', 'comment'):
+            return index
+        index += step
+    return None
+
+
+def _replace(tokens, defines):
+    values = {}
+    for name, value in defines.items():
+        value = str(value).strip()
+        if not _is_literal(value):
+            value = '(%s)' % value
+        values[tuple(name.split('.'))] = value
+    significant = [i for i, token in enumerate(tokens)
+                   if token[0] not in ('whitespace', 'comment')]
+    # names declared in this file might shadow the global ones
+    declared = _declared_names(tokens, significant)
+    values = dict((name, value) for name, value in values.items()
+                  if name[0] not in declared)
+    if not values:
+        return tokens
+    contexts = _contexts(tokens, significant)
+    maxlen = max(map(len, values))
+    result = []
+    i = 0
+    while i < len(tokens):
+        type_, text = tokens[i]
+        if type_ != 'name' or not _is_reference(tokens, i, contexts[i]):
+            result.append(tokens[i])
+            i += 1
+            continue
+        # collect the longest dotted name starting at this token
+        candidates = [((text,), i)]
+        j = i
+        while len(candidates) < maxlen:
+            dot = _significant(tokens, j, 1)
+            if dot is None or tokens[dot][1] != '.':
+                break
+            j = _significant(tokens, dot, 1)
+            if j is None or tokens[j][0] != 'name':
+                break
+            candidates.append((candidates[-1][0] + (tokens[j][1],), j))
+        replacement = None
+        for name, end in reversed(candidates):
+            if name not in values:
+                continue
+            after = _significant(tokens, end, 1)
+            # assignments to defined names are left untouched
+            if after is None or tokens[after][1] not in \
+                    _assignment_operators | {'++', '--'}:
+                replacement = values[name], end
+            break
+        if replacement is None:
+            result.append(tokens[i])
+            i += 1
+        else:
+            result.append(('expression', replacement[0]))
+            i = replacement[1] + 1
+    return result
+
+
+def _brackets(tokens, indexes):
+    """
+    Returns a `dict` mapping the indexes of all opening brackets among given
+    token *indexes* to the indexes of their closing counterparts.
+    """
+    matches = {}
+    stack = []
+    for index in indexes:
+        type_, text = tokens[index]
+        if type_ != 'punctuation':
+            continue
+        if text in ('(', '{', '['):
+            stack.append(index)
+        elif text in (')', '}', ']') and stack:
+            matches[stack.pop()] = index
+    return matches
+
+
+def _declared_names(tokens, significant):
+    """
+    Returns the `set` of names, that are declared anywhere in given *tokens*.
+    This errs on the side of finding too many names, which only costs a few
+    replacements.
+    """
+    sig = [tokens[index] for index in significant]
+    texts = [text for type_, text in sig]
+    newlines = _newlines(tokens, significant)
+    matches = _brackets(sig, range(len(sig)))
+    declared = set()
+    for k, (type_, text) in enumerate(sig):
+        before = texts[k - 1] if k else None
+        if before in ('.', '?.'):
+            continue
+        after = texts[k + 1] if k + 1 < len(sig) else None
+        if type_ == 'name':
+            if before in ('function', 'class') or after == '=>' or \
+                    before == '*' and k > 1 and texts[k - 2] == 'function':
+                declared.add(text)
+            elif text in _declaration_keywords:
+                declared.update(
+                    _declarators(sig, newlines, matches, k + 1))
+            elif text == 'import' and after not in ('(', '.'):
+                for type_, text in sig[k + 1:]:
+                    if text in ('from', ';') or type_ == 'string':
+                        break
+                    if type_ == 'name':
+                        declared.add(text)
+        elif text == '(' and k in matches:
+            end = matches[k]
+            following = texts[end + 1] if end + 1 < len(sig) else None
+            # parameter lists of functions, arrow functions, methods and
+            # catch clauses
+            if following == '=>' or before in ('function', 'catch') or \
+                    k > 1 and texts[k - 2] in ('function', '*') or \
+                    following == '{' and sig[k - 1][0] == 'name' and \
+                    before not in _control_keywords:
+                declared.update(text for type_, text in sig[k + 1:end]
+                                if type_ == 'name')
+    return declared
+
+
+def _newlines(tokens, significant):
+    """
+    Returns a `list` indicating for each of the *significant* tokens, whether
+    it is preceded by a line break.
+    """
+    newlines = []
+    previous = -1
+    for index in significant:
+        newlines.append(any('\n' in text
+                            for type_, text in tokens[previous + 1:index]))
+        previous = index
+    return newlines
+
+
+def _declarators(sig, newlines, matches, k):
+    """
+    Generates the names bound by the ``var``, ``let`` or ``const`` list
+    starting at the significant token with index *k*.
+    """
+    binding = True
+    while k < len(sig):
+        type_, text = sig[k]
+        if binding:
+            if type_ == 'name':
+                yield text
+            elif text in ('{', '[') and k in matches:
+                # destructuring pattern
+                for type_, text in sig[k:matches[k]]:
+                    if type_ == 'name':
+                        yield text
+                k = matches[k]
+            else:
+                return
+            binding = False
+        elif text == ',':
+            binding = True
+        elif text in ('(', '{', '[') and k in matches:
+            k = matches[k]
+        elif text in (';', ')', '}', ']'):
+            return
+        elif newlines[k] and type_ in ('name', 'number', 'string') and \
+                (sig[k - 1][0] != 'punctuation' or
+                 sig[k - 1][1] in (')', ']', '}')):
+            # automatic semicolon insertion
+            return
+        k += 1
+
+
+def _contexts(tokens, significant):
+    """
+    Returns a `dict` mapping the index of each significant token to a 2-tuple
+    containing the innermost bracket enclosing it and whether it is part of
+    a destructuring assignment (like ``[a, b] = b``).
+    """
+    matches = _brackets(tokens, significant)
+    patterns = set()
+    for opening, closing in matches.items():
+        if tokens[opening][1] == '(':
+            continue
+        after = _significant(tokens, closing, 1)
+        if after is None or tokens[after][1] != '=':
+            continue
+        before = _significant(tokens, opening, -1)
+        if tokens[opening][1] == '[' and before is not None and (
+                tokens[before][0] in ('name', 'number', 'string') or
+                tokens[before][1] in (')', ']')):
+            # member access
+            continue
+        patterns.add(opening)
+    contexts = {}
+    stack = []
+    for index in significant:
+        type_, text = tokens[index]
+        if type_ == 'punctuation' and text in (')', '}', ']') and stack:
+            stack.pop()
+        contexts[index] = (
+            tokens[stack[-1]][1] if stack else None,
+            any(opening in patterns for opening in stack))
+        if index in matches:
+            stack.append(index)
+    return contexts
+
+
+def _is_reference(tokens, index, context):
+    bracket, in_pattern = context
+    if in_pattern:
+        return False
+    before = _significant(tokens, index, -1)
+    after = _significant(tokens, index, 1)
+    before = tokens[before][1] if before is not None else None
+    if before in ('.', '?.', '++', '--'):
+        return False
+    if bracket != '{' or after is None:
+        return True
+    if before in ('{', ',') and tokens[after][1] in (':', ',', '}'):
+        # object literal key or shorthand property
+        return False
+    if tokens[after][1] == '(':
+        closing = _matching(tokens, after)
+        body = closing is not None and _significant(tokens, closing, 1)
+        if body and tokens[body][1] == '{':
+            # method definition
+            return False
+    return True
+
+
+def _evaluate(tokens):
+    """
+    Returns the truthiness of the condition consisting of given significant
+    *tokens*, or `None` if the condition is not a simple literal.
+    """
+    negate = False
+    while tokens and tokens[0][1] == '!':
+        negate = not negate
+        tokens = tokens[1:]
+    while len(tokens) >= 2 and tokens[0][1] == '(' and tokens[-1][1] == ')':
+        tokens = tokens[1:-1]
+    if len(tokens) == 2 and tokens[0][1] == '!':
+        negate = not negate
+        tokens = tokens[1:]
+    if len(tokens) != 1:
+        return None
+    type_, text = tokens[0]
+    if type_ == 'expression':
+        if not _is_literal(text):
+            return None
+        type_ = 'string' if text[0] in '"\'' else 'name'
+        if text[0] in '-0123456789.':
+            type_ = 'number'
+    if type_ == 'name':
+        if text in ('true',):
+            value = True
+        elif text in ('false', 'null', 'undefined'):
+            value = False
+        else:
+            return None
+    elif type_ == 'number':
+        try:
+            value = float(text) != 0
+        except ValueError:
+            return None
+    elif type_ == 'string' and text[0] != '`':
+        value = len(text) > 2
+    else:
+        return None
+    return value != negate
+
+
+def _matching(tokens, index):
+    """
+    Returns the index of the bracket closing the one at *index*.
+    """
+    opening = tokens[index][1]
+    closing = {'(': ')', '{': '}', '[': ']'}[opening]
+    depth = 0
+    for i in range(index, len(tokens)):
+        if tokens[i][0] != 'punctuation':
+            continue
+        if tokens[i][1] == opening:
+            depth += 1
+        elif tokens[i][1] == closing:
+            depth -= 1
+            if not depth:
+                return i
+    return None
+
+
+def _parse_if(tokens, index):
+    """
+    Parses the ``if`` statement starting at *index* and returns a 4-tuple
+    containing the condition's truthiness, the index range of the braced
+    *then* block, the index range of the *else* branch (or `None`) and the
+    index of the last token of the statement. Returns `None` if the statement
+    cannot be folded.
+    """
+    before = _significant(tokens, index, -1)
+    if before is not None and tokens[before][1] in ('.', '?.'):
+        return None
+    start = _significant(tokens, index, 1)
+    if start is None or tokens[start][1] != '(':
+        return None
+    end = _matching(tokens, start)
+    if end is None:
+        return None
+    condition = [token for token in tokens[start + 1:end]
+                 if token[0] not in ('whitespace', 'comment')]
+    value = _evaluate(condition)
+    if value is None:
+        return None
+    then_start = _significant(tokens, end, 1)
+    if then_start is None or tokens[then_start][1] != '{':
+        return None
+    then_end = _matching(tokens, then_start)
+    if then_end is None:
+        return None
+    last = then_end
+    else_range = None
+    else_index = _significant(tokens, then_end, 1)
+    if else_index is not None and tokens[else_index] == ('name', 'else'):
+        else_start = _significant(tokens, else_index, 1)
+        if else_start is None:
+            return None
+        if tokens[else_start][1] == '{':
+            else_end = _matching(tokens, else_start)
+        elif tokens[else_start] == ('name', 'if'):
+            else_end = _statement_end(tokens, else_start)
+        else:
+            return None
+        if else_end is None:
+            return None
+        else_range = (else_start, else_end)
+        last = else_end
+    return value, (then_start, then_end), else_range, last
+
+
+def _statement_end(tokens, index):
+    """
+    Returns the index of the last token of the ``if`` statement at *index*,
+    as long as all of its branches are braced blocks.
+    """
+    start = _significant(tokens, index, 1)
+    if start is None or tokens[start][1] != '(':
+        return None
+    end = _matching(tokens, start)
+    if end is None:
+        return None
+    block = _significant(tokens, end, 1)
+    if block is None or tokens[block][1] != '{':
+        return None
+    last = _matching(tokens, block)
+    if last is None:
+        return None
+    else_index = _significant(tokens, last, 1)
+    if else_index is None or tokens[else_index] != ('name', 'else'):
+        return last
+    branch = _significant(tokens, else_index, 1)
+    if branch is None:
+        return None
+    if tokens[branch][1] == '{':
+        return _matching(tokens, branch)
+    if tokens[branch] == ('name', 'if'):
+        return _statement_end(tokens, branch)
+    return None
+
+
+def _fold(tokens):
+    result = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] != ('name', 'if'):
+            result.append(tokens[i])
+            i += 1
+            continue
+        parsed = _parse_if(tokens, i)
+        if parsed is None:
+            result.append(tokens[i])
+            i += 1
+            continue
+        value, then_range, else_range, last = parsed
+        if value:
+            kept = tokens[then_range[0]:then_range[1] + 1]
+            removed = tokens[then_range[1] + 1:last + 1]
+        elif else_range:
+            kept = tokens[else_range[0]:else_range[1] + 1]
+            removed = tokens[then_range[0]:else_range[0]]
+        else:
+            kept = []
+            removed = tokens[then_range[0]:then_range[1] + 1]
+        hoisted = _hoisted_names(removed)
+        if hoisted is None:
+            result.append(tokens[i])
+            i += 1
+            continue
+        if hoisted:
+            # variables declared in the removed branch still exist, they are
+            # just never assigned
+            kept = [('punctuation', '{')] + kept + [
+                ('expression', 'var %s;' % ', '.join(hoisted)),
+                ('punctuation', '}')]
+        elif not kept:
+            # an empty block is valid wherever the if statement was
+            kept = [('punctuation', '{'), ('punctuation', '}')]
+        result.extend(_fold(kept))
+        i = last + 1
+    return result
+
+
+def _hoisted_names(tokens):
+    """
+    Returns the `list` of names declared with ``var`` in given *tokens*
+    outside of nested functions. Returns `None` if the *tokens* contain a
+    function declaration, since those are hoisted differently depending on
+    strict mode.
+    """
+    significant = [i for i, token in enumerate(tokens)
+                   if token[0] not in ('whitespace', 'comment')]
+    sig = [tokens[index] for index in significant]
+    newlines = _newlines(tokens, significant)
+    matches = _brackets(sig, range(len(sig)))
+    openings = dict((closing, opening)
+                    for opening, closing in matches.items())
+    names = []
+    k = 0
+    while k < len(sig):
+        type_, text = sig[k]
+        before = sig[k - 1][1] if k else None
+        if text == '{' and k in matches and \
+                _is_function_body(sig, openings, k):
+            k = matches[k] + 1
+            continue
+        if type_ == 'name' and before not in ('.', '?.'):
+            if text == 'function' and \
+                    before in (None, '{', '}', ';', ')', 'else', 'do'):
+                return None
+            if text == 'var':
+                for name in _declarators(sig, newlines, matches, k + 1):
+                    if name not in names:
+                        names.append(name)
+        k += 1
+    return names
+
+
+def _is_function_body(sig, openings, k):
+    """
+    Tests whether the brace at significant index *k* opens the body of a
+    function, method or arrow function.
+    """
+    if not k:
+        return False
+    if sig[k - 1][1] == '=>':
+        return True
+    if sig[k - 1][1] != ')' or k - 1 not in openings:
+        return False
+    opening = openings[k - 1]
+    return not opening or sig[opening - 1][1] not in \
+        _control_keywords | {'catch'}
@@ -51,11 +51,18 @@ Currently, the following minification backends are supported:
 
 
 from abc import ABCMeta, abstractmethod
+import copy
 import logging
+import os
+import re
+import shutil
 import subprocess
+import tempfile
 
 log = logging.getLogger('score.js.minifier')
 
+_sourcemap_url_regex = re.compile(r'\n?//# sourceMappingURL=\S*\s*$')
+
 
 def minify_string(js, outfile=None):
     """
@@ -81,8 +88,19 @@ class MinifierBackend(metaclass=ABCMeta):
     Abstract base class for minifier backends.
     """
 
+    #: Whether this backend implements :meth:`minify_string_with_sourcemap`.
+    supports_sourcemaps = False
+
+    #: Whether this backend replaces the global names in :attr:`defines`
+    #: with their values and removes the resulting dead code.
+    supports_defines = False
+
     def __init__(self, shortname):
         self.log = log.getChild(shortname)
+        #: A `dict` mapping global names to javascript expressions, that
+        #: should replace them. Only used if the backend
+        #: :attr:`supports_defines`.
+        self.defines = {}
 
     @abstractmethod
     def minify_file(self, file, outfile=None):
@@ -100,6 +118,38 @@ class MinifierBackend(metaclass=ABCMeta):
         """
         return
 
+    def minify_string_with_sourcemap(self, string, *, path=None):
+        """
+        Minifies given *string* and returns a 2-tuple containing the result and
+        a :class:`score.js.sourcemap.SourceMap` mapping the result to the
+        original *string*, which will be referenced under the name *path* in
+        the map.
+
+        Only available if the backend :attr:`supports_sourcemaps`.
+        """
+        raise NotImplementedError(
+            '%s does not support source maps' % self.__class__.__name__)
+
+    def module_variant(self):
+        """
+        Provides a backend for minifying complete :ref:`module bundles
+        <js_module_bundles>`, which are only loaded by modern browsers.
+        Backends may use this opportunity to produce smaller output, that
+        relies on module semantics, like mangling top-level names. The
+        default implementation returns the backend itself.
+        """
+        return self
+
+    def warmup(self):
+        """
+        Performs all expensive preparations of this backend, like importing
+        libraries or verifying that required executables exist. Backends,
+        that need such preparations, will perform them automatically on first
+        use, but calling this function earlier allows failing fast and keeps
+        the cost away from the first minification.
+        """
+        pass
+
 
 class Slimit(MinifierBackend):
     """
@@ -109,14 +159,20 @@ class Slimit(MinifierBackend):
     """
 
     def __init__(self):
+        MinifierBackend.__init__(self, 'slimit')
+        self._initialized = False
+
+    def warmup(self):
         """
         Initializes the slimit library. This will fix an error in current
         version of ply.
         See https://github.com/rspivak/slimit/issues/64#issuecomment-38801874
         for details.
         """
-        MinifierBackend.__init__(self, 'slimit')
+        if self._initialized:
+            return
         from ply import yacc
+        import slimit  # noqa
 
         def __getitem__(self, n):
             if isinstance(n, slice):
@@ -126,11 +182,13 @@ class Slimit(MinifierBackend):
             else:
                 return self.stack[n].value
         yacc.YaccProduction.__getitem__ = __getitem__
+        self._initialized = True
 
     def minify_file(self, file, outfile=None):
         return self.minify_string(open(file, 'r').read(), outfile)
 
     def minify_string(self, string, outfile=None, *, path=None):
+        self.warmup()
         from slimit import minify
         result = minify(string, mangle=True)
         if outfile:
@@ -149,6 +207,9 @@ class Jsmin(MinifierBackend):
     def __init__(self):
         MinifierBackend.__init__(self, 'jsmin')
 
+    def warmup(self):
+        import jsmin  # noqa
+
     def minify_file(self, file, outfile=None):
         return self.jsmin_str(open(file, 'r').read())
 
@@ -168,13 +229,41 @@ class Uglifyjs(MinifierBackend):
     .. _uglifyjs: https://github.com/mishoo/UglifyJS
     """
 
+    supports_sourcemaps = True
+    supports_defines = True
+
     def __init__(self, uglify_path='uglifyjs'):
         MinifierBackend.__init__(self, 'uglifyjs')
         self.uglify_path = uglify_path
+        self.module = False
 
-    def minify_file(self, file, outfile=None):
+    def _args(self):
         args = [self.uglify_path, '--mangle', '--compress',
                 '--comments', '/^!|@license|@preserve/']
+        if self.module:
+            args.append('--module')
+        if self.defines:
+            args += ['--define', ','.join(
+                '%s=%s' % item for item in sorted(self.defines.items()))]
+        return args
+
+    def module_variant(self):
+        """
+        Provides a copy of this backend passing ``--module`` to uglifyjs,
+        which allows mangling top-level names and assumes strict mode.
+        Requires uglifyjs 3.15 or later.
+        """
+        variant = copy.copy(self)
+        variant.module = True
+        return variant
+
+    def warmup(self):
+        if not shutil.which(self.uglify_path):
+            raise FileNotFoundError(
+                'uglifyjs executable not found: %s' % (self.uglify_path,))
+
+    def minify_file(self, file, outfile=None):
+        args = self._args()
         if outfile:
             args += ['--output', outfile]
         args.append(file)
@@ -198,8 +287,7 @@ class Uglifyjs(MinifierBackend):
             return str(output, 'UTF-8')
 
     def minify_string(self, js, outfile=None, *, path=None):
-        args = [self.uglify_path, '--mangle', '--compress',
-                '--comments', '/^!|@license|@preserve/']
+        args = self._args()
         if outfile:
             args += ['--output', outfile]
         process = subprocess.Popen(args,
@@ -226,6 +314,41 @@ class Uglifyjs(MinifierBackend):
         if not outfile:
             return str(output, 'UTF-8')
 
+    def minify_string_with_sourcemap(self, js, *, path=None):
+        from .sourcemap import SourceMap
+        with tempfile.TemporaryDirectory(prefix='score.js-') as tmpdir:
+            infile = os.path.join(tmpdir, 'input.js')
+            outfile = os.path.join(tmpdir, 'output.js')
+            with open(infile, 'w', encoding='UTF-8') as fp:
+                fp.write(js)
+            args = self._args() + [
+                '--source-map', 'includeSources',
+                '--output', outfile, infile]
+            process = subprocess.Popen(args,
+                                       stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            output, error = process.communicate()
+            if process.returncode:
+                raise subprocess.CalledProcessError(
+                    process.returncode,
+                    ' '.join(map(lambda x: repr(x), args)),
+                    error)
+            if error:
+                try:
+                    error = str(error, 'UTF-8').strip()
+                except UnicodeDecodeError:
+                    pass
+                self.log.info('warnings for %s:\n%s' % (path or infile, error))
+            with open(outfile, encoding='UTF-8') as fp:
+                result = fp.read()
+            with open(outfile + '.map', encoding='UTF-8') as fp:
+                sourcemap = SourceMap.from_json(fp.read())
+        result = _sourcemap_url_regex.sub('', result)
+        sourcemap.sources = [path or 'input.js']
+        sourcemap.sources_content = [js]
+        return result, sourcemap
+
 
 class YuiCompressor(MinifierBackend):
     """
@@ -240,6 +363,13 @@ class YuiCompressor(MinifierBackend):
         self.jar_path = jar_path
         MinifierBackend.__init__(self, 'yui')
 
+    def warmup(self):
+        if not shutil.which('java'):
+            raise FileNotFoundError('java executable not found')
+        if not os.path.isfile(self.jar_path):
+            raise FileNotFoundError(
+                'yuicompressor jar not found: %s' % (self.jar_path,))
+
     def minify_file(self, file, outfile=None):
         args = ['java', '-jar', self.jar_path,
                 '--type', 'js', '--charset', 'UTF-8', '-v']
@@ -0,0 +1,169 @@
+# Copyright © 2015-2018 STRG.AT GmbH, Vienna, Austria
+# Copyright © 2019 Necdet Can Ateşman <can@atesman.at>, Vienna, Austria
+#
+# This file is part of the The SCORE Framework.
+#
+# The SCORE Framework and all its parts are free software: you can redistribute
+# them and/or modify them under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation which is in
+# the file named COPYING.LESSER.txt.
+#
+# The SCORE Framework and all its parts are distributed without any WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. For more details see the GNU Lesser General Public
+# License.
+#
+# If you have not received a copy of the GNU Lesser General Public License see
+# http://www.gnu.org/licenses/.
+#
+# The License-Agreement realised between you as Licensee and STRG.AT GmbH as
+# Licenser including the issue of its valid conclusion and its pre- and
+# post-contractual effects is governed by the laws of Austria. Any disputes
+# concerning this License-Agreement including the issue of its valid conclusion
+# and its pre- and post-contractual effects are exclusively decided by the
+# competent court, in whose district STRG.AT GmbH has its registered seat, at
+# the discretion of STRG.AT GmbH also the competent court, in whose district
+# the Licensee has his registered seat, an establishment or assets.
+
+
+"""
+Helpers for analyzing the composition of javascript bundles. A report lists
+the raw, minified and gzipped size of every path in a bundle, each path's
+share of the whole bundle and--if the report of a previous build is
+available--the changes since that build.
+"""
+
+import gzip
+from html import escape as html_escape
+
+
+#: The size measures available in reports.
+measures = ('raw', 'minified', 'gzipped')
+
+
+def _gzip_size(content):
+    return len(gzip.compress(content.encode('UTF-8'), compresslevel=9))
+
+
+def create_report(js, paths, previous=None):
+    """
+    Creates the report of a bundle consisting of given *paths* using the
+    configured :class:`score.js.ConfiguredJsModule` *js*. The optional
+    *previous* report is used for calculating the differences to an earlier
+    build.
+
+    The return value is a `dict` that can be serialized as JSON. It contains
+    a list of ``paths`` with their sizes, the ``total`` sizes of the bundle
+    and the list of paths, that were ``removed`` since the *previous* build.
+
+    The minified and gzipped ``total`` sizes are measured on the actual bundle
+    as delivered by the webassets proxy. The sizes of the individual paths
+    are measured by processing each file on its own and are thus only an
+    approximation of each file's contribution.
+    """
+    entries = []
+    for path in paths:
+        raw = js.tpl.render(path, apply_postprocessors=False)
+        minified = js._render_segment(path)[0]
+        entries.append({
+            'path': path,
+            'raw': len(raw.encode('UTF-8')),
+            'minified': len(minified.encode('UTF-8')),
+            'gzipped': _gzip_size(minified),
+        })
+    proxy = js.score_webassets_proxy()
+    if len(paths) == 1:
+        # score.webassets delivers single paths as assets, not as bundles
+        bundle = proxy.render(paths[0])
+    else:
+        bundle = proxy.create_bundle(paths)
+    total = {
+        'raw': sum(entry['raw'] for entry in entries),
+        'minified': len(bundle.encode('UTF-8')),
+        'gzipped': _gzip_size(bundle),
+    }
+    minified_sum = sum(entry['minified'] for entry in entries)
+    for entry in entries:
+        if minified_sum:
+            entry['share'] = entry['minified'] / minified_sum
+        else:
+            entry['share'] = 0.0
+    removed = []
+    if previous:
+        previous_entries = dict((entry['path'], entry)
+                                for entry in previous['paths'])
+        for entry in entries:
+            _add_delta(entry, previous_entries.get(entry['path']))
+        _add_delta(total, previous['total'])
+        removed = [path for path in previous_entries if path not in paths]
+    return {
+        'paths': entries,
+        'total': total,
+        'removed': removed,
+    }
+
+
+def _add_delta(entry, previous):
+    entry['delta'] = dict(
+        (measure, entry[measure] - (previous[measure] if previous else 0))
+        for measure in measures)
+
+
+def check_budget(report, total=None, path=None, measure='gzipped'):
+    """
+    Tests the sizes in given *report* against the configured budgets and
+    returns a `list` of messages describing each violation. The *total* budget
+    is the maximum size of the whole bundle, whereas the *path* budget
+    applies to every single path. Both values are in bytes and refer to the
+    given *measure*, which must be one of :data:`measures`.
+    """
+    if measure not in measures:
+        raise ValueError('Invalid measure "%s"' % (measure,))
+    violations = []
+    if total is not None and report['total'][measure] > total:
+        violations.append('bundle exceeds budget: %d > %d bytes (%s)' % (
+            report['total'][measure], total, measure))
+    if path is not None:
+        for entry in report['paths']:
+            if entry[measure] > path:
+                violations.append('%s exceeds budget: %d > %d bytes (%s)' % (
+                    entry['path'], entry[measure], path, measure))
+    return violations
+
+
+def render_html(report, title='Bundle Report'):
+    """
+    Renders given *report* as a standalone HTML document.
+    """
+
+    def cells(entry):
+        result = ''
+        for measure in measures:
+            result += '<td>%d</td>' % entry[measure]
+            if 'delta' in entry:
+                result += '<td>%+d</td>' % entry['delta'][measure]
+        return result
+
+    header = ''
+    for measure in measures:
+        header += '<th>%s</th>' % measure
+        if 'delta' in report['total']:
+            header += '<th>&Delta; %s</th>' % measure
+    rows = []
+    for entry in report['paths']:
+        rows.append('<tr><td>%s</td>%s<td>%.1f%%</td></tr>' % (
+            html_escape(entry['path']), cells(entry), entry['share'] * 100))
+    rows.append('<tr><th>total</th>%s<td>100.0%%</td></tr>' % (
+        cells(report['total']),))
+    removed = ''
+    if report['removed']:
+        removed = '<p>Removed: %s</p>' % ', '.join(
+            html_escape(path) for path in report['removed'])
+    return (
+        '<!DOCTYPE html>\n'
+        '<html><head><meta charset="utf-8"><title>%s</title></head><body>\n'
+        '<h1>%s</h1>\n'
+        '<table>\n<tr><th>path</th>%s<th>share</th></tr>\n%s\n</table>\n'
+        '%s</body></html>\n') % (
+            html_escape(title), html_escape(title), header, '\n'.join(rows),
+            removed)
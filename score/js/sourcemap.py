@@ -0,0 +1,227 @@
+# Copyright © 2015-2018 STRG.AT GmbH, Vienna, Austria
+# Copyright © 2019 Necdet Can Ateşman <can@atesman.at>, Vienna, Austria
+#
+# This file is part of the The SCORE Framework.
+#
+# The SCORE Framework and all its parts are free software: you can redistribute
+# them and/or modify them under the terms of the GNU Lesser General Public
+# License version 3 as published by the Free Software Foundation which is in
+# the file named COPYING.LESSER.txt.
+#
+# The SCORE Framework and all its parts are distributed without any WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. For more details see the GNU Lesser General Public
+# License.
+#
+# If you have not received a copy of the GNU Lesser General Public License see
+# http://www.gnu.org/licenses/.
+#
+# The License-Agreement realised between you as Licensee and STRG.AT GmbH as
+# Licenser including the issue of its valid conclusion and its pre- and
+# post-contractual effects is governed by the laws of Austria. Any disputes
+# concerning this License-Agreement including the issue of its valid conclusion
+# and its pre- and post-contractual effects are exclusively decided by the
+# competent court, in whose district STRG.AT GmbH has its registered seat, at
+# the discretion of STRG.AT GmbH also the competent court, in whose district
+# the Licensee has his registered seat, an establishment or assets.
+
+
+"""
+Minimal implementation of the `source map revision 3`_ format. It is just
+powerful enough to parse the maps generated by minifiers, to create trivial
+maps for unmodified content and to merge multiple maps, when their generated
+files are concatenated.
+
+.. _source map revision 3: https://sourcemaps.info/spec.html
+"""
+
+import json
+
+
+_base64_chars = \
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_base64_values = dict((char, i) for i, char in enumerate(_base64_chars))
+
+
+def encode_vlq(value):
+    """
+    Encodes a single integer *value* as a base64 VLQ string.
+    """
+    if value < 0:
+        value = ((-value) << 1) | 1
+    else:
+        value <<= 1
+    result = ''
+    while True:
+        digit = value & 0x1F
+        value >>= 5
+        if value:
+            digit |= 0x20
+        result += _base64_chars[digit]
+        if not value:
+            return result
+
+
+def decode_vlq(string):
+    """
+    Decodes a *string* containing base64 VLQ values and returns the `list` of
+    integers it contains.
+    """
+    values = []
+    value = shift = 0
+    for char in string:
+        digit = _base64_values[char]
+        value += (digit & 0x1F) << shift
+        if digit & 0x20:
+            shift += 5
+            continue
+        if value & 1:
+            values.append(-(value >> 1))
+        else:
+            values.append(value >> 1)
+        value = shift = 0
+    return values
+
+
+class SourceMap:
+    """
+    A decoded source map. The *lines* are stored as a `list` containing a
+    `list` of segments for each generated line. Every segment is a `tuple`
+    with absolute values (unlike the relative values found in the encoded
+    ``mappings``) containing the generated column, optionally followed by the
+    source index, the original line and the original column and an optional
+    index into *names*.
+    """
+
+    def __init__(self, sources=None, sources_content=None, names=None,
+                 lines=None):
+        self.sources = list(sources or [])
+        if sources_content is None:
+            sources_content = [None] * len(self.sources)
+        self.sources_content = list(sources_content)
+        self.names = list(names or [])
+        self.lines = list(lines or [])
+
+    @classmethod
+    def identity(cls, source, content):
+        """
+        Creates a map for *content*, that was copied verbatim from the file
+        with the given *source* name.
+        """
+        lines = [[(0, 0, line, 0)] for line in range(content.count('\n') + 1)]
+        return cls([source], [content], [], lines)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Parses a source map in its JSON representation. The *data* may either
+        be a `str` or an already decoded `dict`.
+        """
+        if isinstance(data, (str, bytes)):
+            data = json.loads(data)
+        if data.get('version') != 3:
+            raise ValueError('Unsupported source map version %r' %
+                             (data.get('version'),))
+        if 'sections' in data:
+            raise ValueError('Indexed source maps are not supported')
+        lines = []
+        state = [0, 0, 0, 0, 0]
+        for line in data.get('mappings', '').split(';'):
+            state[0] = 0
+            segments = []
+            for segment in line.split(','):
+                if not segment:
+                    continue
+                values = decode_vlq(segment)
+                for i, value in enumerate(values):
+                    state[i] += value
+                segments.append(tuple(state[:len(values)]))
+            lines.append(segments)
+        return cls(data.get('sources', []),
+                   data.get('sourcesContent'),
+                   data.get('names', []),
+                   lines)
+
+    def to_json(self, file=None):
+        """
+        Returns the `dict` representation of this map, ready to be serialized
+        with :func:`json.dumps`.
+        """
+        result = {
+            'version': 3,
+            'sources': self.sources,
+            'names': self.names,
+            'mappings': self._encode_mappings(),
+        }
+        if file:
+            result['file'] = file
+        if any(content is not None for content in self.sources_content):
+            result['sourcesContent'] = self.sources_content
+        return result
+
+    def _encode_mappings(self):
+        state = [0, 0, 0, 0, 0]
+        encoded_lines = []
+        for segments in self.lines:
+            state[0] = 0
+            encoded_segments = []
+            for segment in segments:
+                encoded = ''
+                for i, value in enumerate(segment):
+                    encoded += encode_vlq(value - state[i])
+                    state[i] = value
+                encoded_segments.append(encoded)
+            encoded_lines.append(','.join(encoded_segments))
+        return ';'.join(encoded_lines)
+
+    def append(self, other, line_offset):
+        """
+        Merges the map *other* into this one, assuming that the generated
+        content of *other* starts at the beginning of the generated line with
+        the given *line_offset*.
+        """
+        source_indexes = []
+        for source, content in zip(other.sources, other.sources_content):
+            source_indexes.append(len(self.sources))
+            self.sources.append(source)
+            self.sources_content.append(content)
+        name_offset = len(self.names)
+        self.names.extend(other.names)
+        if len(self.lines) < line_offset:
+            self.lines.extend([] for _ in range(line_offset - len(self.lines)))
+        for i, segments in enumerate(other.lines):
+            line = line_offset + i
+            while len(self.lines) <= line:
+                self.lines.append([])
+            for segment in segments:
+                segment = list(segment)
+                if len(segment) > 1:
+                    segment[1] = source_indexes[segment[1]]
+                if len(segment) > 4:
+                    segment[4] += name_offset
+                self.lines[line].append(tuple(segment))
+
+
+def concatenate(parts, separator='\n'):
+    """
+    Concatenates the content of multiple *parts* with given *separator* and
+    merges their source maps. Every part must be a 2-tuple consisting of the
+    generated content and its :class:`SourceMap`, which may be `None` for
+    content that has no corresponding source. The *separator* must end with a
+    newline, as every part is expected to start at the first column of a line.
+
+    Returns a 2-tuple containing the concatenated content and the merged
+    :class:`SourceMap`.
+    """
+    result = SourceMap()
+    contents = []
+    line = 0
+    separator_lines = separator.count('\n')
+    for content, sourcemap in parts:
+        if contents:
+            line += separator_lines
+        if sourcemap is not None:
+            result.append(sourcemap, line)
+        contents.append(content)
+        line += content.count('\n')
+    return separator.join(contents), result
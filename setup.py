@@ -62,5 +62,11 @@ setup(
     ],
     install_requires=[
         'score.webassets >= 0.3.22',
+        'click',
     ],
+    entry_points={
+        'score.cli': [
+            'js = score.js.cli:main',
+        ],
+    },
 )
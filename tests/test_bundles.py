@@ -0,0 +1,38 @@
+import score.js
+import score.tpl
+
+
+def init(rootdir, files, **conf):
+    for path, content in files.items():
+        file = rootdir / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content)
+    tpl = score.tpl.init({'rootdir': str(rootdir)})
+    js = score.js.init(conf, tpl)
+    tpl._finalize()
+    return js
+
+
+files = {
+    'a.js': 'var a = 1;',
+    'lib.min.js': 'var b=2;',
+    'c.js': 'var c = 3;',
+}
+
+
+def test_banners(tmp_path):
+    js = init(tmp_path, files)
+    content = js.score_webassets_proxy().create_bundle(list(files))
+    for path in files:
+        assert path in content
+    assert content.count('/*****') == 2 * len(files)
+
+
+def test_layout_independent_of_sourcemap(tmp_path):
+    paths = list(files)
+    plain = init(tmp_path / 'plain', files)
+    mapped = init(tmp_path / 'mapped', files, sourcemap='true')
+    plain_content = plain.score_webassets_proxy().create_bundle(paths)
+    mapped_content = mapped.score_webassets_proxy().create_bundle(paths)
+    assert mapped_content.startswith(plain_content + '\n//# sourceMappingURL=')
+    assert plain.score_webassets_proxy().render('a.js') == 'var a = 1;'
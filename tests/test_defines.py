@@ -0,0 +1,150 @@
+import pytest
+
+from score.js.defines import apply_defines, tokenize
+
+
+@pytest.mark.parametrize('js', [
+    'var a = 1;',
+    'x = a / b / c;',
+    'x = /[/]"/g.test(y);',
+    'return /a/.test(b) // comment',
+    'var s = "a\\"b", t = `${c}`; /* multi\nline */',
+    'a++ / 2',
+    'a >>>= b ?? c?.d',
+    'var s = "unterminated',
+])
+def test_tokenize_roundtrip(js):
+    assert ''.join(text for type_, text in tokenize(js)) == js
+
+
+def test_tokenize_types():
+    tokens = [token for token in tokenize('x = /a/g; y = x / 2; z ??= 1')
+              if token[0] != 'whitespace']
+    assert tokens == [
+        ('name', 'x'), ('punctuation', '='), ('regex', '/a/g'),
+        ('punctuation', ';'),
+        ('name', 'y'), ('punctuation', '='), ('name', 'x'),
+        ('punctuation', '/'), ('number', '2'), ('punctuation', ';'),
+        ('name', 'z'), ('punctuation', '??='), ('number', '1'),
+    ]
+
+
+@pytest.mark.parametrize('js, expected', [
+    ('f(DEBUG);', 'f(false);'),
+    ('x = typeof DEBUG;', 'x = typeof false;'),
+    ('x = {a: DEBUG};', 'x = {a: false};'),
+    ('x = [DEBUG, 1];', 'x = [false, 1];'),
+    ('x = a ? DEBUG : b;', 'x = a ? false : b;'),
+    ('x = o.DEBUG;', 'x = o.DEBUG;'),
+    ('x = {DEBUG: 1};', 'x = {DEBUG: 1};'),
+    ('x = {DEBUG};', 'x = {DEBUG};'),
+    ('x = {a, DEBUG};', 'x = {a, DEBUG};'),
+    ('x = {DEBUG() {}};', 'x = {DEBUG() {}};'),
+    ('class A { DEBUG() {} }', 'class A { DEBUG() {} }'),
+    ('DEBUG = 1;', 'DEBUG = 1;'),
+    ('DEBUG += 1;', 'DEBUG += 1;'),
+    ('DEBUG ??= 1;', 'DEBUG ??= 1;'),
+    ('DEBUG++;', 'DEBUG++;'),
+    ('--DEBUG;', '--DEBUG;'),
+    ('[a, DEBUG] = b;', '[a, DEBUG] = b;'),
+    ('({DEBUG} = b);', '({DEBUG} = b);'),
+    ('a[DEBUG] = 1;', 'a[false] = 1;'),
+])
+def test_replace(js, expected):
+    assert apply_defines(js, {'DEBUG': 'false'}) == expected
+
+
+@pytest.mark.parametrize('js', [
+    'function f(DEBUG) { return DEBUG; }',
+    'var f = function (a, DEBUG) { return DEBUG; };',
+    'var f = DEBUG => DEBUG;',
+    'var f = (a, DEBUG) => DEBUG;',
+    'try {} catch (DEBUG) { log(DEBUG); }',
+    'var DEBUG = true; f(DEBUG);',
+    'var a = 1, DEBUG; f(DEBUG);',
+    'let a = f(1, 2),\n    DEBUG = 1; f(DEBUG);',
+    'let {DEBUG} = o; f(DEBUG);',
+    'const [a, {b: DEBUG}] = o; f(DEBUG);',
+    'function DEBUG() {} DEBUG();',
+    'class DEBUG {} new DEBUG();',
+    'class A { m(DEBUG) { return DEBUG; } }',
+    'import {DEBUG} from "x"; f(DEBUG);',
+])
+def test_replace_skips_declared_names(js):
+    assert apply_defines(js, {'DEBUG': 'false'}) == js
+
+
+def test_replace_after_declaration_list():
+    js = 'var a = 1\nf(DEBUG)'
+    assert apply_defines(js, {'DEBUG': 'false'}) == 'var a = 1\nf(false)'
+
+
+def test_replace_dotted_names():
+    js = 'if (process.env.NODE_ENV === "x") {}; f(process.env.NODE_ENV);'
+    defines = {'process.env.NODE_ENV': '"production"'}
+    assert apply_defines(js, defines) == \
+        'if ("production" === "x") {}; f("production");'
+
+
+def test_replace_expression():
+    assert apply_defines('f(VERSION);', {'VERSION': '1 + 2'}) == \
+        'f((1 + 2));'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1', '1'),
+    ('-1.5', '-1.5'),
+    ('.5', '.5'),
+    ('1.', '1.'),
+    ('2e10', '2e10'),
+    ('.', '(.)'),
+    ('1.2.3', '(1.2.3)'),
+    ('-', '(-)'),
+    ('1e', '(1e)'),
+])
+def test_replace_numbers(value, expected):
+    assert apply_defines('f(A);', {'A': value}) == 'f(%s);' % expected
+
+
+@pytest.mark.parametrize('js, expected', [
+    ('if (DEBUG) { a(); } b();', '{} b();'),
+    ('if (DEBUG) { a(); } else { b(); }', '{ b(); }'),
+    ('if (!DEBUG) { a(); } else { b(); }', '{ a(); }'),
+    ('if ((DEBUG)) { a(); }', '{}'),
+    ('if (DEBUG) { a(); } else if (x) { b(); } else { c(); }',
+     'if (x) { b(); } else { c(); }'),
+    ('if (x) { a(); } else if (DEBUG) { b(); }', 'if (x) { a(); } else {}'),
+    ('if (DEBUG) { if (DEBUG) { a(); } }', '{}'),
+    ('if (!DEBUG) { if (DEBUG) { a(); } b(); }', '{ {} b(); }'),
+    # only braced blocks and simple conditions are folded
+    ('if (DEBUG) a();', 'if (false) a();'),
+    ('if (DEBUG && x) { a(); }', 'if (false && x) { a(); }'),
+    ('o.if (DEBUG) { a(); }', 'o.if (false) { a(); }'),
+])
+def test_fold(js, expected):
+    assert apply_defines(js, {'DEBUG': 'false'}) == expected
+
+
+@pytest.mark.parametrize('js, expected', [
+    ('if (DEBUG) { var log = 1; }\nif (log) { x(); }',
+     '{var log;}\nif (log) { x(); }'),
+    ('if (!DEBUG) { a(); } else { var b = 1, c; }', '{{ a(); }var b, c;}'),
+    ('if (DEBUG) { for (var i = 0; i < 1; i++) {} }', '{var i;}'),
+    ('if (DEBUG) { try {} catch (e) { var d; } }', '{var d;}'),
+    # variables of nested functions are not hoisted
+    ('if (DEBUG) { f(function () { var a; }, () => { var b; }); }', '{}'),
+    ('if (DEBUG) { x = function f() {}; }', '{}'),
+    # function declarations are left to the minifier
+    ('if (DEBUG) { function f() {} }', 'if (false) { function f() {} }'),
+])
+def test_fold_keeps_hoisted_declarations(js, expected):
+    assert apply_defines(js, {'DEBUG': 'false'}) == expected
+
+
+def test_fold_literals():
+    assert apply_defines('if (A) { a(); }', {'A': '"x"'}) == '{ a(); }'
+    assert apply_defines('if (A) { a(); }', {'A': '""'}) == '{}'
+    assert apply_defines('if (A) { a(); }', {'A': '0'}) == '{}'
+    assert apply_defines('if (A) { a(); }', {'A': 'null'}) == '{}'
+    assert apply_defines('if (A) { a(); }', {'A': 'f()'}) == \
+        'if ((f())) { a(); }'
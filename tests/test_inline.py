@@ -0,0 +1,154 @@
+import pytest
+
+import score.js
+from score.js._init import escape_script
+import score.tpl
+
+
+def init(rootdir, files, **conf):
+    for path, content in files.items():
+        file = rootdir / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content)
+    tpl = score.tpl.init({'rootdir': str(rootdir)})
+    js = score.js.init(conf, tpl)
+    tpl._finalize()
+    return js
+
+
+@pytest.fixture
+def js(tmp_path):
+    return init(tmp_path, {
+        'foo.js': 'var foo = 1;',
+        'b/foo.js': 'var nested = 2;',
+    }, **{'inline.threshold': '1000'})
+
+
+@pytest.fixture
+def proxy(js):
+    return js.score_webassets_proxy()
+
+
+@pytest.mark.parametrize('js, expected', [
+    ('a = "</script>";', 'a = "<\\/script>";'),
+    ('a = "</SCRIPT >";', 'a = "<\\/SCRIPT >";'),
+    ('a = "<!--";', 'a = "<\\!--";'),
+    ('a = "<script>" + b < c;', 'a = "<script>" + b < c;'),
+])
+def test_escape_script(js, expected):
+    assert escape_script(js) == expected
+
+
+def test_inline_escapes(tmp_path):
+    js = init(tmp_path, {'a.js': 'x = "</script>";'},
+              **{'inline.threshold': '1000'})
+    assert js.score_webassets_proxy().render_url(
+        '/_assets/js/a.js', paths=['a.js']) == \
+        '<script>x = "<\\/script>";</script>'
+
+
+def test_inline_threshold(tmp_path):
+    js = init(tmp_path, {
+        'small.js': 'var a;',
+        'large.js': 'var ' + 'a' * 100 + ';',
+    }, **{'inline.threshold': '50'})
+    proxy = js.score_webassets_proxy()
+    assert proxy.render_url('/_assets/js/small.js', paths=['small.js']) == \
+        '<script>var a;</script>'
+    assert proxy.render_url('/_assets/js/large.js', paths=['large.js']) == \
+        '<script src="/_assets/js/large.js"></script>'
+    assert proxy.render_url('/_assets/js/large.js', paths=['large.js'],
+                            inline=True).startswith('<script>var aaa')
+    assert proxy.render_url('/_assets/js/small.js', paths=['small.js'],
+                            inline=False) == \
+        '<script src="/_assets/js/small.js"></script>'
+    # scripts are never inlined without their paths
+    assert proxy.render_url('/_assets/js/small.js') == \
+        '<script src="/_assets/js/small.js"></script>'
+
+
+def test_inline_disabled_by_default(tmp_path):
+    js = init(tmp_path, {'a.js': 'var a;'})
+    proxy = js.score_webassets_proxy()
+    assert proxy.render_url('/_assets/js/a.js', paths=['a.js']) == \
+        '<script src="/_assets/js/a.js"></script>'
+    assert proxy.render_url('/_assets/js/a.js', paths=['a.js'],
+                            inline=True) == '<script>var a;</script>'
+
+
+def test_inline_bundle(tmp_path):
+    js = init(tmp_path, {'a.js': 'var a;', 'b.js': 'var b;'})
+    content = js.score_webassets_proxy().render_url(
+        '/_assets/js/__bundle_x__?_v=1', paths=['a.js', 'b.js'], inline=True)
+    assert content.startswith('<script>/*')
+    assert content.index('var a;') < content.index('var b;')
+
+
+def test_inline_nonce(proxy):
+    assert proxy.render_url('/_assets/js/foo.js', paths=['foo.js'],
+                            nonce='a"b') == \
+        '<script nonce="a&quot;b">var foo = 1;</script>'
+    assert proxy.render_url('/_assets/js/foo.js', paths=['foo.js'],
+                            nonce='n', type='module') == \
+        '<script type="module" nonce="n">var foo = 1;</script>'
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(inline=True),
+    dict(inline=True, paths=[]),
+    dict(inline=True, paths=['b/foo.js']),
+    dict(inline=True, paths=['foo.js'], defer=True),
+    dict(inline=True, paths=['foo.js'], async_=True),
+    dict(inline=True, paths=['foo.js'], fetchpriority='high'),
+    dict(paths=['foo.js'], fetchpriority='urgent'),
+])
+def test_inline_errors(proxy, kwargs):
+    with pytest.raises(ValueError):
+        proxy.render_url('/_assets/js/foo.js', **kwargs)
+
+
+def test_inline_skipped_for_async_scripts(proxy):
+    assert proxy.render_url('/_assets/js/foo.js', paths=['foo.js'],
+                            defer=True) == \
+        '<script src="/_assets/js/foo.js" defer="defer"></script>'
+
+
+def test_inline_nested_path(proxy):
+    paths = ['foo.js', 'b/foo.js']
+    assert proxy.render_url('/_assets/js/b/foo.js?_v=1', paths=paths) == \
+        '<script>var nested = 2;</script>'
+    assert proxy.render_url('/_assets/js/foo.js?_v=1', paths=paths) == \
+        '<script>var foo = 1;</script>'
+
+
+def test_inline_nested_path_with_module_name(proxy):
+    # the module name must not be mistaken for a directory
+    paths = ['js/foo.js', 'foo.js']
+    assert proxy.render_url('/_assets/js/foo.js?_v=1', paths=paths) == \
+        '<script>var foo = 1;</script>'
+
+
+def test_inline_custom_url(proxy):
+    paths = ['foo.js', 'b/foo.js']
+    assert proxy.render_url('/static/b/foo.js', paths=paths) == \
+        '<script>var nested = 2;</script>'
+
+
+def test_inline_csp_hashes(tmp_path, js, proxy):
+    csp_hash = js.inline_csp_hash(['foo.js'])
+    assert csp_hash.startswith("'sha256-")
+    # hashes, that were only requested, are not part of the list
+    assert js.inline_csp_hash(['b/foo.js']) != csp_hash
+    assert js.inline_csp_hashes() == []
+    proxy.render_url('/_assets/js/foo.js?_v=1', paths=['foo.js'])
+    assert js.inline_csp_hashes() == [csp_hash]
+    # changed scripts are omitted until they are inlined again
+    (tmp_path / 'foo.js').write_text('var foo = 2;')
+    assert js.inline_csp_hashes() == []
+    proxy.render_url('/_assets/js/foo.js?_v=2', paths=['foo.js'])
+    assert js.inline_csp_hashes() == [js.inline_csp_hash(['foo.js'])]
+    assert js.inline_csp_hashes() != [csp_hash]
+
+
+def test_proxy_is_reused(js):
+    assert js.score_webassets_proxy() is js.score_webassets_proxy()
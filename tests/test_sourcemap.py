@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from score.js.sourcemap import SourceMap, concatenate, decode_vlq, encode_vlq
+
+
+@pytest.mark.parametrize('value, encoded', [
+    (0, 'A'),
+    (1, 'C'),
+    (-1, 'D'),
+    (15, 'e'),
+    (16, 'gB'),
+    (-16, 'hB'),
+    (123, '2H'),
+    (123456789, 'qxmvrH'),
+])
+def test_vlq(value, encoded):
+    assert encode_vlq(value) == encoded
+    assert decode_vlq(encoded) == [value]
+
+
+def test_decode_vlq_sequence():
+    assert decode_vlq('AAgBC') == [0, 0, 16, 1]
+
+
+def test_json_roundtrip():
+    data = {
+        'version': 3,
+        'sources': ['a.js', 'b.js'],
+        'names': ['foo', 'bar'],
+        'mappings': 'AAAA,IAAIA;;ACAA,KAAKC,CAAC;AACN',
+        'sourcesContent': ['a', None],
+    }
+    sourcemap = SourceMap.from_json(json.dumps(data))
+    assert sourcemap.lines == [
+        [(0, 0, 0, 0), (4, 0, 0, 4, 0)],
+        [],
+        [(0, 1, 0, 4), (5, 1, 0, 9, 1), (6, 1, 0, 10)],
+        [(0, 1, 1, 4)],
+    ]
+    assert sourcemap.to_json() == data
+    assert sourcemap.to_json('x.js')['file'] == 'x.js'
+
+
+def test_from_json_rejects_other_versions():
+    with pytest.raises(ValueError):
+        SourceMap.from_json({'version': 2, 'mappings': ''})
+    with pytest.raises(ValueError):
+        SourceMap.from_json({'version': 3, 'sections': []})
+
+
+def test_identity():
+    sourcemap = SourceMap.identity('a.js', 'a;\nb;\n')
+    assert sourcemap.lines == [[(0, 0, 0, 0)], [(0, 0, 1, 0)],
+                               [(0, 0, 2, 0)]]
+    assert sourcemap.to_json()['sourcesContent'] == ['a;\nb;\n']
+
+
+def test_concatenate():
+    a = SourceMap(['a.js'], ['a'], ['x'], [[(0, 0, 0, 0, 0)], [(2, 0, 1, 0)]])
+    b = SourceMap(['b.js'], ['b'], ['y'], [[(0, 0, 0, 0, 0)]])
+    content, sourcemap = concatenate(
+        [('a1\na2', a), ('/* banner */', None), ('b1', b)], '\n;\n')
+    assert content == 'a1\na2\n;\n/* banner */\n;\nb1'
+    assert sourcemap.sources == ['a.js', 'b.js']
+    assert sourcemap.sources_content == ['a', 'b']
+    assert sourcemap.names == ['x', 'y']
+    assert sourcemap.lines == [
+        [(0, 0, 0, 0, 0)],
+        [(2, 0, 1, 0)],
+        [],
+        [],
+        [],
+        [(0, 1, 0, 0, 1)],
+    ]
+    # the line of every segment points to the original content
+    lines = content.split('\n')
+    assert lines[5] == 'b1'
+
+
+def test_concatenate_without_maps():
+    content, sourcemap = concatenate([('a', None), ('b', None)], '\n\n')
+    assert content == 'a\n\nb'
+    assert sourcemap.lines == []
+    assert sourcemap.to_json()['mappings'] == ''
+
+
+def test_concatenate_multiline_parts():
+    a = SourceMap.identity('a.js', 'a\nb\nc')
+    b = SourceMap.identity('b.js', 'd')
+    content, sourcemap = concatenate([('a\nb\nc', a), ('d', b)])
+    assert content.split('\n').index('d') == 3
+    assert sourcemap.lines[3] == [(0, 1, 0, 0)]